@@ -16,62 +16,143 @@ Usage:
 """
 
 import os
+import re
 import sys
 import json
+import types
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Optional faster JSON parser for the Firebase service-account config
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Library module: root logging is left to the application (see configure_logging);
+# until then warnings still reach stderr through logging.lastResort
 logger = logging.getLogger('ec2_config')
 
+# Resolved once; used to build the per-user config candidates
+_HOME = os.path.expanduser('~')
+
+# Default config file locations, in priority order (after any explicit path)
+_ENV_PATHS = (
+    '.env',
+    '/etc/dbmigration/.env',
+    f'{_HOME}/.dbmigration/.env',
+    '/opt/dbmigration/.env',
+)
+_FIREBASE_PATHS = (
+    'firebase-config.json',
+    '/etc/dbmigration/firebase-config.json',
+    f'{_HOME}/.dbmigration/firebase-config.json',
+    '/opt/dbmigration/firebase-config.json',
+)
+
+# KEY=VALUE lines of a .env file; values may be double/single quoted, and
+# unquoted values may carry a trailing " # comment". Note that this means an
+# unquoted value is cut at the first " #" (quote values containing it), and
+# lines whose key is not a plain identifier (e.g. "export KEY=...") are skipped.
+_ENV_RE = re.compile(
+    rb'(?m)^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*'
+    rb'(?:"([^"]*)"|\'([^\']*)\'|([^\r\n]*?))'
+    rb'[ \t]*(?:[ \t]#[^\r\n]*)?\r?$'
+)
+
+# Firebase service-account field -> environment variable
+_FIREBASE_ENV_MAP = (
+    ('type', 'FIREBASE_TYPE'),
+    ('project_id', 'FIREBASE_PROJECT_ID'),
+    ('private_key_id', 'FIREBASE_PRIVATE_KEY_ID'),
+    ('private_key', 'FIREBASE_PRIVATE_KEY'),
+    ('client_email', 'FIREBASE_CLIENT_EMAIL'),
+    ('client_id', 'FIREBASE_CLIENT_ID'),
+    ('auth_uri', 'FIREBASE_AUTH_URI'),
+    ('token_uri', 'FIREBASE_TOKEN_URI'),
+    ('auth_provider_x509_cert_url', 'FIREBASE_AUTH_PROVIDER_CERT_URL'),
+    ('client_x509_cert_url', 'FIREBASE_CLIENT_CERT_URL'),
+    ('web_api_key', 'FIREBASE_WEB_API_KEY'),
+)
+
 
-class EC2Secrets:
+def configure_logging(level: int = logging.INFO):
+    """Configure root logging for standalone or debug runs of this module"""
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def _parse_env_data(data: bytes) -> Dict[str, str]:
+    """Parse the contents of a .env file into a KEY -> value dict"""
+    return {
+        m.group(1).decode(): (m.group(2) or m.group(3) or m.group(4) or b'').decode()
+        for m in _ENV_RE.finditer(data)
+    }
+
+
+def _resolve_first_existing(paths: tuple) -> Optional[str]:
+    """Return the first existing config file from candidates, in priority order"""
+    for path in paths:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class EC2Secrets(Mapping):
     """
     A Streamlit-secrets-compatible configuration class for EC2 deployments.
     Loads configuration from environment variables, .env file, or JSON config.
+    Behaves as a read-only Mapping over the loaded configuration.
     """
     
+    __slots__ = ('_config', '_loaded', '_firebase_from_file')
+    
     def __init__(self):
-        self._config: Dict[str, Any] = {}
+        # _config is deliberately left unset until load(); the first access
+        # goes through __getattr__, which loads once. After that the
+        # accessors below read the instance attribute with no load check.
         self._loaded = False
+        self._firebase_from_file: Optional[Dict[str, Any]] = None
+    
+    def __getattr__(self, name: str) -> Any:
+        """Lazily load configuration on first access to _config"""
+        if name == '_config':
+            self.load()
+            return self._config
+        raise AttributeError(name)
     
     def load(self, env_file: Optional[str] = None, config_file: Optional[str] = None):
         """Load configuration from multiple sources"""
         
-        # Load from .env file if it exists
-        env_paths = [
-            env_file,
-            '.env',
-            '/etc/dbmigration/.env',
-            os.path.expanduser('~/.dbmigration/.env'),
-            '/opt/dbmigration/.env'
-        ]
+        # Already loaded and no explicit sources requested - nothing to do
+        if self._loaded and env_file is None and config_file is None:
+            return self
+        
+        # Load from .env file if it exists; an explicit path is probed directly
+        if env_file and os.path.isfile(env_file):
+            env_path = env_file
+        else:
+            env_path = _resolve_first_existing(_ENV_PATHS)
         
-        for env_path in env_paths:
-            if env_path and os.path.exists(env_path):
-                self._load_env_file(env_path)
-                logger.info(f"Loaded configuration from {env_path}")
-                break
+        if env_path:
+            self._load_env_file(env_path)
+            logger.info(f"Loaded configuration from {env_path}")
         
         # Load Firebase config from JSON file if exists
-        firebase_paths = [
-            config_file,
-            'firebase-config.json',
-            '/etc/dbmigration/firebase-config.json',
-            os.path.expanduser('~/.dbmigration/firebase-config.json'),
-            '/opt/dbmigration/firebase-config.json'
-        ]
+        if config_file and os.path.isfile(config_file):
+            fb_path = config_file
+        else:
+            fb_path = _resolve_first_existing(_FIREBASE_PATHS)
         
-        for fb_path in firebase_paths:
-            if fb_path and os.path.exists(fb_path):
-                self._load_firebase_config(fb_path)
-                logger.info(f"Loaded Firebase config from {fb_path}")
-                break
+        self._firebase_from_file = None
+        if fb_path:
+            self._firebase_from_file = self._load_firebase_config(fb_path)
+            logger.info(f"Loaded Firebase config from {fb_path}")
         
         # Build Streamlit-compatible structure
         self._build_config()
@@ -82,133 +163,131 @@ class EC2Secrets:
     def _load_env_file(self, filepath: str):
         """Parse and load a .env file"""
         try:
-            with open(filepath, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    # Skip comments and empty lines
-                    if not line or line.startswith('#'):
-                        continue
-                    # Parse KEY=VALUE
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip().strip('"').strip("'")
-                        os.environ[key] = value
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            # Single regex pass over the whole file, then one bulk environ update
+            os.environ.update(_parse_env_data(data))
         except Exception as e:
             logger.warning(f"Could not load env file {filepath}: {e}")
     
-    def _load_firebase_config(self, filepath: str):
+    def _load_firebase_config(self, filepath: str) -> Optional[Dict[str, Any]]:
         """Load Firebase service account JSON"""
         try:
-            with open(filepath, 'r') as f:
-                firebase_config = json.load(f)
-                # Store in environment as JSON string
-                os.environ['FIREBASE_CONFIG_JSON'] = json.dumps(firebase_config)
+            with open(filepath, 'rb') as f:
+                firebase_config = _json_loads(f.read())
         except Exception as e:
             logger.warning(f"Could not load Firebase config {filepath}: {e}")
+            return None
+        if not isinstance(firebase_config, dict):
+            logger.warning(f"Could not load Firebase config {filepath}: expected a JSON object")
+            return None
+        return firebase_config
     
     def _build_config(self):
         """Build Streamlit-compatible secrets structure from environment variables"""
+        env = os.environ
+        config: Dict[str, Any] = {}
         
         # Anthropic API Key (top-level, as expected by the app)
-        if os.getenv('ANTHROPIC_API_KEY'):
-            self._config['ANTHROPIC_API_KEY'] = os.getenv('ANTHROPIC_API_KEY')
+        if (api_key := env.get('ANTHROPIC_API_KEY')):
+            config['ANTHROPIC_API_KEY'] = api_key
         
-        # Firebase Configuration
-        firebase_config = {}
+        # Firebase Configuration - prefer the already-parsed JSON file
+        firebase_config = self._firebase_from_file or {}
         
-        # Try loading from JSON string first
-        if os.getenv('FIREBASE_CONFIG_JSON'):
+        # Then try a JSON string from the environment
+        if not firebase_config and (firebase_json := env.get('FIREBASE_CONFIG_JSON')):
             try:
-                firebase_config = json.loads(os.getenv('FIREBASE_CONFIG_JSON'))
-            except json.JSONDecodeError:
+                firebase_config = _json_loads(firebase_json)
+            except ValueError:
                 pass
+            # Anything but a JSON object is treated like a parse failure
+            if not isinstance(firebase_config, dict):
+                firebase_config = {}
+        
+        # JSON-parsed keys are not interned like the literal keys used
+        # everywhere else, so intern them for pointer-equal dict lookups
+        if firebase_config:
+            firebase_config = {
+                sys.intern(key): value for key, value in firebase_config.items()
+            }
         
         # Or build from individual environment variables
         if not firebase_config:
-            firebase_env_mapping = {
-                'type': 'FIREBASE_TYPE',
-                'project_id': 'FIREBASE_PROJECT_ID',
-                'private_key_id': 'FIREBASE_PRIVATE_KEY_ID',
-                'private_key': 'FIREBASE_PRIVATE_KEY',
-                'client_email': 'FIREBASE_CLIENT_EMAIL',
-                'client_id': 'FIREBASE_CLIENT_ID',
-                'auth_uri': 'FIREBASE_AUTH_URI',
-                'token_uri': 'FIREBASE_TOKEN_URI',
-                'auth_provider_x509_cert_url': 'FIREBASE_AUTH_PROVIDER_CERT_URL',
-                'client_x509_cert_url': 'FIREBASE_CLIENT_CERT_URL',
-                'web_api_key': 'FIREBASE_WEB_API_KEY'
+            firebase_config = {
+                key: value
+                for key, env_var in _FIREBASE_ENV_MAP
+                if (value := env.get(env_var))
             }
-            
-            for key, env_var in firebase_env_mapping.items():
-                if os.getenv(env_var):
-                    firebase_config[key] = os.getenv(env_var)
         
         if firebase_config:
-            self._config['firebase'] = firebase_config
+            config['firebase'] = firebase_config
         
         # Admin Configuration
         admin_config = {}
-        if os.getenv('ADMIN_EMAIL'):
-            admin_config['email'] = os.getenv('ADMIN_EMAIL')
-        if os.getenv('ADMIN_PASSWORD'):
-            admin_config['password'] = os.getenv('ADMIN_PASSWORD')
-        if os.getenv('ADMIN_KEY'):
-            admin_config['key'] = os.getenv('ADMIN_KEY')
+        if (admin_email := env.get('ADMIN_EMAIL')):
+            admin_config['email'] = admin_email
+        if (admin_password := env.get('ADMIN_PASSWORD')):
+            admin_config['password'] = admin_password
+        if (admin_key := env.get('ADMIN_KEY')):
+            admin_config['key'] = admin_key
         
         if admin_config:
-            self._config['admin'] = admin_config
+            config['admin'] = admin_config
         
         # AWS Configuration (for any AWS-specific settings)
-        aws_config = {
-            'region': os.getenv('AWS_DEFAULT_REGION', 'us-east-1'),
+        access_key_id = env.get('AWS_ACCESS_KEY_ID')
+        config['aws'] = {
+            'region': env.get('AWS_DEFAULT_REGION', 'us-east-1'),
+            **({
+                'access_key_id': access_key_id,
+                'secret_access_key': env.get('AWS_SECRET_ACCESS_KEY', ''),
+            } if access_key_id else {}),
         }
-        if os.getenv('AWS_ACCESS_KEY_ID'):
-            aws_config['access_key_id'] = os.getenv('AWS_ACCESS_KEY_ID')
-            aws_config['secret_access_key'] = os.getenv('AWS_SECRET_ACCESS_KEY', '')
-        
-        self._config['aws'] = aws_config
         
         # Application settings
-        self._config['app'] = {
-            'mode': os.getenv('APP_MODE', 'production'),
-            'port': int(os.getenv('APP_PORT', '8501')),
-            'host': os.getenv('APP_HOST', '0.0.0.0'),
-            'debug': os.getenv('APP_DEBUG', 'false').lower() == 'true'
+        config['app'] = {
+            'mode': env.get('APP_MODE', 'production'),
+            'port': int(env.get('APP_PORT', '8501')),
+            'host': env.get('APP_HOST', '0.0.0.0'),
+            'debug': env.get('APP_DEBUG', 'false').lower() == 'true'
         }
+        
+        # Top-level sections are read-only; the section dicts themselves are not.
+        # The proxy cannot be pickled, so neither copy.deepcopy nor pickle works
+        # on secrets (nothing in the app copies it).
+        self._config = types.MappingProxyType(config)
     
     def __contains__(self, key: str) -> bool:
         """Support 'key in secrets' syntax"""
-        if not self._loaded:
-            self.load()
         return key in self._config
     
     def __getitem__(self, key: str) -> Any:
         """Support 'secrets[key]' syntax"""
-        if not self._loaded:
-            self.load()
         return self._config[key]
     
+    def __iter__(self) -> Iterator[str]:
+        """Support iteration over configuration keys"""
+        return iter(self._config)
+    
+    def __len__(self) -> int:
+        """Support len(secrets)"""
+        return len(self._config)
+    
     def get(self, key: str, default: Any = None) -> Any:
         """Support 'secrets.get(key, default)' syntax"""
-        if not self._loaded:
-            self.load()
         return self._config.get(key, default)
     
     def keys(self):
         """Return all configuration keys"""
-        if not self._loaded:
-            self.load()
         return self._config.keys()
     
     def items(self):
         """Return all configuration items"""
-        if not self._loaded:
-            self.load()
         return self._config.items()
     
     def __repr__(self):
-        return f"EC2Secrets(loaded={self._loaded}, sections={list(self._config.keys())})"
+        return f"EC2Secrets(loaded={self._loaded}, sections={list(self._config) if self._loaded else []})"
 
 
 # Global secrets instance
@@ -228,15 +307,28 @@ def load_ec2_config(env_file: Optional[str] = None, config_file: Optional[str] =
         EC2Secrets instance
     """
     global secrets
-    secrets.load(env_file, config_file)
+    
+    # Repeat calls without explicit sources reuse the already-loaded config
+    reload = not secrets._loaded or env_file is not None or config_file is not None
+    if reload:
+        # Configure logging first so the "Loaded ... from" lines are kept
+        if os.environ.get('APP_DEBUG', 'false').lower() == 'true':
+            configure_logging()
+        secrets.load(env_file, config_file)
     
     # Set AWS region as environment variable for boto3
-    os.environ['AWS_DEFAULT_REGION'] = secrets['aws']['region']
+    region = secrets['aws']['region']
+    if os.environ.get('AWS_DEFAULT_REGION') != region:
+        os.environ['AWS_DEFAULT_REGION'] = region
     
-    logger.info("EC2 configuration loaded successfully")
-    logger.info(f"AWS Region: {secrets['aws']['region']}")
-    logger.info(f"Firebase configured: {'firebase' in secrets}")
-    logger.info(f"Anthropic API configured: {'ANTHROPIC_API_KEY' in secrets}")
+    if reload:
+        # APP_DEBUG may only have been set by the .env file just loaded
+        if secrets['app']['debug']:
+            configure_logging()
+        logger.info("EC2 configuration loaded successfully")
+        logger.info(f"AWS Region: {region}")
+        logger.info(f"Firebase configured: {'firebase' in secrets}")
+        logger.info(f"Anthropic API configured: {'ANTHROPIC_API_KEY' in secrets}")
     
     return secrets
 
@@ -267,13 +359,16 @@ def check_configuration() -> Dict[str, Any]:
     Verify configuration is complete.
     Returns status of each configuration section.
     """
-    load_ec2_config()
+    # Snapshot the underlying dict once instead of re-entering the accessors
+    config = load_ec2_config()._config
+    firebase = config.get('firebase') or {}
+    admin = config.get('admin') or {}
     
     status = {
-        'anthropic_api': 'ANTHROPIC_API_KEY' in secrets,
-        'firebase': 'firebase' in secrets and bool(secrets.get('firebase', {}).get('project_id')),
-        'admin': 'admin' in secrets and bool(secrets.get('admin', {}).get('email')),
-        'aws_region': bool(secrets['aws']['region']),
+        'anthropic_api': 'ANTHROPIC_API_KEY' in config,
+        'firebase': bool(firebase.get('project_id')),
+        'admin': bool(admin.get('email')),
+        'aws_region': bool(config['aws']['region']),
     }
     
     return status
@@ -283,42 +378,48 @@ def print_config_status():
     """Print current configuration status for debugging"""
     load_ec2_config()
     
-    print("\n" + "="*60)
-    print("AWS Database Migration Analyzer - EC2 Configuration Status")
-    print("="*60)
+    # Collect everything first and emit it with a single write
+    lines = [
+        "\n" + "="*60,
+        "AWS Database Migration Analyzer - EC2 Configuration Status",
+        "="*60,
+        f"\n📁 Configuration Sections: {list(secrets.keys())}",
+        "\n🤖 Anthropic AI:",
+    ]
     
-    print(f"\n📁 Configuration Sections: {list(secrets.keys())}")
-    
-    print(f"\n🤖 Anthropic AI:")
     if 'ANTHROPIC_API_KEY' in secrets:
         key = secrets['ANTHROPIC_API_KEY']
-        print(f"   API Key: {key[:10]}...{key[-4:] if len(key) > 14 else ''}")
+        lines.append(f"   API Key: {key[:10]}...{key[-4:] if len(key) > 14 else ''}")
     else:
-        print("   ❌ Not configured (AI features disabled)")
+        lines.append("   ❌ Not configured (AI features disabled)")
     
-    print(f"\n🔥 Firebase:")
+    lines.append("\n🔥 Firebase:")
     if 'firebase' in secrets:
         fb = secrets['firebase']
-        print(f"   Project ID: {fb.get('project_id', 'Not set')}")
-        print(f"   Client Email: {fb.get('client_email', 'Not set')}")
-        print(f"   Web API Key: {'✓ Set' if fb.get('web_api_key') else '✗ Not set'}")
+        lines.append(f"   Project ID: {fb.get('project_id', 'Not set')}")
+        lines.append(f"   Client Email: {fb.get('client_email', 'Not set')}")
+        lines.append(f"   Web API Key: {'✓ Set' if fb.get('web_api_key') else '✗ Not set'}")
     else:
-        print("   ❌ Not configured (running in demo mode)")
+        lines.append("   ❌ Not configured (running in demo mode)")
     
-    print(f"\n👤 Admin:")
+    lines.append("\n👤 Admin:")
     if 'admin' in secrets:
         admin = secrets['admin']
-        print(f"   Email: {admin.get('email', 'Not set')}")
-        print(f"   Password: {'✓ Set' if admin.get('password') else '✗ Not set'}")
+        lines.append(f"   Email: {admin.get('email', 'Not set')}")
+        lines.append(f"   Password: {'✓ Set' if admin.get('password') else '✗ Not set'}")
     else:
-        print("   ❌ Not configured")
+        lines.append("   ❌ Not configured")
+    
+    aws = secrets['aws']
+    lines.append("\n☁️  AWS:")
+    lines.append(f"   Region: {aws['region']}")
+    lines.append(f"   Using IAM Role: {'access_key_id' not in aws}")
     
-    print(f"\n☁️  AWS:")
-    print(f"   Region: {secrets['aws']['region']}")
-    print(f"   Using IAM Role: {'access_key_id' not in secrets['aws']}")
+    lines.append("\n" + "="*60)
     
-    print("\n" + "="*60)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
+    configure_logging()
     print_config_status()